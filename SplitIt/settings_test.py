@@ -0,0 +1,23 @@
+"""
+Django settings for running the SplitIt test suite.
+
+`python manage.py test` selects this module automatically.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+# Keep the test database in memory regardless of the development database
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+# Tests don't need a deliberately slow password hash
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+# Test classes are independent, so run them in parallel by default
+TEST_RUNNER = 'SplitIt.test_runner.ParallelDiscoverRunner'
@@ -0,0 +1,10 @@
+from django.test.runner import DiscoverRunner
+
+
+class ParallelDiscoverRunner(DiscoverRunner):
+    """Test runner that spreads test classes across all CPU cores unless --parallel says otherwise"""
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(parallel='auto')
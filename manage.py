@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SplitIt.settings')
+    # Tests run against their own settings (in-memory database, fast password hasher)
+    settings_module = 'SplitIt.settings_test' if sys.argv[1:2] == ['test'] else 'SplitIt.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
@@ -5,10 +5,30 @@ Test script to demonstrate the Split It API functionality
 
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Base URL for the API
 BASE_URL = "http://localhost:8000/api"
 
+def create_session():
+    """Create a session that keeps connections to the API alive between calls"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=16,
+        max_retries=Retry(total=3, backoff_factor=0.2)
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def authenticate(session, user_data):
+    """Request a JWT pair for a single test user"""
+    return user_data, session.post(f"{BASE_URL}/auth/token/", json=user_data)
+
 def test_api():
     """Test the Split It API functionality"""
     
@@ -18,28 +38,32 @@ def test_api():
         {"username": "bob", "password": "testpass123"},
         {"username": "charlie", "password": "testpass123"}
     ]
+    session = create_session()
     
     # Create test users
     print("Creating test users...")
-    for user_data in test_users:
-        try:
-            response = requests.post(f"{BASE_URL}/auth/token/", json=user_data)
-            if response.status_code == 200:
-                print(f"✓ User {user_data['username']} authenticated successfully")
-            else:
-                print(f"✗ Failed to authenticate user {user_data['username']}: {response.text}")
-        except requests.exceptions.ConnectionError:
-            print("✗ Could not connect to the API. Make sure the server is running.")
-            return
-    
-    # Get token for alice
-    response = requests.post(f"{BASE_URL}/auth/token/", json=test_users[0])
-    if response.status_code != 200:
+    # Authentication calls are independent, so issue them concurrently
+    try:
+        with ThreadPoolExecutor(max_workers=len(test_users)) as executor:
+            auth_results = list(executor.map(partial(authenticate, session), test_users))
+    except requests.exceptions.ConnectionError:
+        print("✗ Could not connect to the API. Make sure the server is running.")
+        return
+    tokens = {}
+    for user_data, response in auth_results:
+        if response.status_code == 200:
+            tokens[user_data['username']] = response.json().get('access')
+            print(f"✓ User {user_data['username']} authenticated successfully")
+        else:
+            print(f"✗ Failed to authenticate user {user_data['username']}: {response.text}")
+    
+    # Reuse alice's token from the authentication round above
+    token = tokens.get(test_users[0]['username'])
+    if not token:
         print("✗ Failed to get authentication token")
         return
     
-    token = response.json()['access']
-    headers = {"Authorization": f"Bearer {token}"}
+    session.headers.update({"Authorization": f"Bearer {token}"})
     
     print("\n" + "="*50)
     print("TESTING SPLIT IT API FUNCTIONALITY")
@@ -51,7 +75,7 @@ def test_api():
         "name": "Weekend Trip",
         "description": "Splitting expenses for a weekend trip"
     }
-    response = requests.post(f"{BASE_URL}/occasions/", json=occasion_data, headers=headers)
+    response = session.post(f"{BASE_URL}/occasions/", json=occasion_data)
     if response.status_code == 201:
         occasion = response.json()
         print(f"✓ Created occasion: {occasion['name']} (ID: {occasion['id']})")
@@ -66,7 +90,7 @@ def test_api():
         "description": "Group dinner at restaurant",
         "occasion": occasion['id']
     }
-    response = requests.post(f"{BASE_URL}/events/", json=event_data, headers=headers)
+    response = session.post(f"{BASE_URL}/events/", json=event_data)
     if response.status_code == 201:
         event = response.json()
         print(f"✓ Created event: {event['name']} (ID: {event['id']})")
@@ -74,6 +98,13 @@ def test_api():
         print(f"✗ Failed to create event: {response.text}")
         return
     
+    # Expenditure POSTs share one prepared request; only the body changes per call
+    expenditure_request = session.prepare_request(requests.Request("POST", f"{BASE_URL}/expenditures/"))
+    
+    def create_expenditure(payload):
+        expenditure_request.prepare_body(data=None, files=None, json=payload)
+        return session.send(expenditure_request)
+    
     # 3. Create an expenditure with equal split
     print("\n3. Creating an expenditure with equal split...")
     expenditure_data = {
@@ -83,7 +114,7 @@ def test_api():
         "split_type": "equal",
         "split_user_ids": [2, 3]  # Assuming bob and charlie have IDs 2 and 3
     }
-    response = requests.post(f"{BASE_URL}/expenditures/", json=expenditure_data, headers=headers)
+    response = create_expenditure(expenditure_data)
     if response.status_code == 201:
         expenditure = response.json()
         print(f"✓ Created expenditure: {expenditure['description']} - ${expenditure['amount']}")
@@ -102,7 +133,7 @@ def test_api():
         "split_user_ids": [2, 3],
         "custom_amounts": ["60.00", "40.00"]
     }
-    response = requests.post(f"{BASE_URL}/expenditures/", json=custom_expenditure_data, headers=headers)
+    response = create_expenditure(custom_expenditure_data)
     if response.status_code == 201:
         custom_expenditure = response.json()
         print(f"✓ Created custom expenditure: {custom_expenditure['description']} - ${custom_expenditure['amount']}")
@@ -111,9 +142,14 @@ def test_api():
         print(f"✗ Failed to create custom expenditure: {response.text}")
         return
     
+    # 5 and 6 are read-only and independent, so fetch them concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        balance_future = executor.submit(session.get, f"{BASE_URL}/user/balance/")
+        summary_future = executor.submit(session.get, f"{BASE_URL}/occasions/{occasion['id']}/summary/")
+    
     # 5. Get user balance
     print("\n5. Getting user balance...")
-    response = requests.get(f"{BASE_URL}/user/balance/", headers=headers)
+    response = balance_future.result()
     if response.status_code == 200:
         balance = response.json()
         print(f"✓ User balance:")
@@ -125,7 +161,7 @@ def test_api():
     
     # 6. Get occasion summary
     print("\n6. Getting occasion summary...")
-    response = requests.get(f"{BASE_URL}/occasions/{occasion['id']}/summary/", headers=headers)
+    response = summary_future.result()
     if response.status_code == 200:
         summary = response.json()
         print(f"✓ Occasion summary:")
@@ -142,7 +178,7 @@ def test_api():
         "amount": "40.00",
         "description": "Settlement payment"
     }
-    response = requests.post(f"{BASE_URL}/payments/", json=payment_data, headers=headers)
+    response = session.post(f"{BASE_URL}/payments/", json=payment_data)
     if response.status_code == 201:
         payment = response.json()
         print(f"✓ Created payment: ${payment['amount']} to user {payment['to_user_id']}")
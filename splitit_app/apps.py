@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SplititAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'splitit_app'
+
+    def ready(self):
+        # Keep stored user balances in step with expenditure splits
+        from . import signals  # noqa: F401
@@ -0,0 +1,63 @@
+from collections import defaultdict
+from django.db.models import BigIntegerField, Case, F, When
+from .models import Expenditure, ExpenditureSplit, UserBalance, to_cents
+
+
+def paid_by_id(split):
+    """Return the payer of the split's expenditure without reloading a cached expenditure"""
+    if ExpenditureSplit.expenditure.is_cached(split):
+        return split.expenditure.paid_by_id
+    return Expenditure.objects.filter(pk=split.expenditure_id).values_list('paid_by_id', flat=True).first()
+
+
+def contribution(user_id, amount, is_paid, paid_by_id):
+    """Return the (debtor, creditor, cents) a split adds to balances, or None"""
+    if is_paid or user_id == paid_by_id:
+        return None
+    return user_id, paid_by_id, to_cents(amount)
+
+
+def apply_balance_changes(contributions, sign=1):
+    """Add (or with sign=-1, remove) split contributions to the stored user balances"""
+    owed = defaultdict(int)
+    owes = defaultdict(int)
+    for debtor_id, creditor_id, cents in filter(None, contributions):
+        owed[debtor_id] += sign * cents
+        owes[creditor_id] += sign * cents
+
+    user_ids = (owed.keys() | owes.keys()) - {None}
+    if not user_ids:
+        return
+
+    # One UPDATE covers debtor and creditor rows alike; F() expressions keep
+    # concurrent updates to the same row consistent
+    UserBalance.objects.filter(user_id__in=user_ids).update(
+        total_owed_cents=Case(
+            *[When(user_id=user_id, then=F('total_owed_cents') + delta) for user_id, delta in owed.items()],
+            default=F('total_owed_cents'),
+            output_field=BigIntegerField()
+        ),
+        total_owes_cents=Case(
+            *[When(user_id=user_id, then=F('total_owes_cents') + delta) for user_id, delta in owes.items()],
+            default=F('total_owes_cents'),
+            output_field=BigIntegerField()
+        ),
+        version=F('version') + 1
+    )
+
+
+def apply_split_balances(splits, sign=1):
+    """Apply the balance effect of splits to the stored user balances"""
+    # Resolve the payers of all splits without a cached expenditure in one query
+    uncached = {split.expenditure_id for split in splits if not ExpenditureSplit.expenditure.is_cached(split)}
+    payers = dict(Expenditure.objects.filter(pk__in=uncached).values_list('id', 'paid_by_id')) if uncached else {}
+
+    def payer_of(split):
+        if ExpenditureSplit.expenditure.is_cached(split):
+            return split.expenditure.paid_by_id
+        return payers.get(split.expenditure_id)
+
+    apply_balance_changes(
+        [contribution(split.user_id, split.amount, split.is_paid, payer_of(split)) for split in splits],
+        sign
+    )
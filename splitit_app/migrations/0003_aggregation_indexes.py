@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-15 19:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('splitit_app', '0002_payment_expenditure_split'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expenditure',
+            index=models.Index(fields=['event', 'paid_by'], name='splitit_app_event_i_df01c2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expendituresplit',
+            index=models.Index(fields=['user', 'is_paid'], name='splitit_app_user_id_32f5ef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['from_user', 'status'], name='splitit_app_from_us_491495_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['to_user', 'status'], name='splitit_app_to_user_63aae8_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-15 20:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('splitit_app', '0004_userbalance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expenditure',
+            index=models.Index(fields=['paid_by', '-created_at'], name='splitit_app_paid_by_680348_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expendituresplit',
+            index=models.Index(fields=['expenditure', 'is_paid'], name='splitit_app_expendi_1db4e1_idx'),
+        ),
+    ]
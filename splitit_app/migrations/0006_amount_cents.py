@@ -0,0 +1,85 @@
+# Generated by Django 5.2.7 on 2026-10-15 20:10
+
+import django.core.validators
+import splitit_app.models
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Cast, Round
+
+
+MODEL_NAMES = ['expenditure', 'expendituresplit', 'payment']
+
+
+def decimal_to_cents(apps, schema_editor):
+    # Round before casting; SQLite keeps decimals as floats and the cast truncates
+    for model_name in MODEL_NAMES:
+        apps.get_model('splitit_app', model_name).objects.update(
+            amount=Cast(Round(F('amount_decimal') * 100), models.BigIntegerField())
+        )
+
+
+def cents_to_decimal(apps, schema_editor):
+    for model_name in MODEL_NAMES:
+        model = apps.get_model('splitit_app', model_name)
+        rows = list(model.objects.only('amount'))
+        for row in rows:
+            row.amount_decimal = row.amount
+        model.objects.bulk_update(rows, ['amount_decimal'], batch_size=500)
+
+
+def cents_field():
+    return splitit_app.models.CentsField(
+        default=Decimal('0.00'),
+        max_digits=10,
+        validators=[django.core.validators.MinValueValidator(Decimal('0.01'))]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('splitit_app', '0005_query_shape_indexes'),
+    ]
+
+    operations = [
+        *[
+            migrations.RenameField(
+                model_name=model_name,
+                old_name='amount',
+                new_name='amount_decimal',
+            )
+            for model_name in MODEL_NAMES
+        ],
+        # Nullable so that unapplying can re-add the column before refilling it
+        *[
+            migrations.AlterField(
+                model_name=model_name,
+                name='amount_decimal',
+                field=models.DecimalField(
+                    decimal_places=2,
+                    max_digits=10,
+                    null=True,
+                    validators=[django.core.validators.MinValueValidator(Decimal('0.01'))]
+                ),
+            )
+            for model_name in MODEL_NAMES
+        ],
+        *[
+            migrations.AddField(
+                model_name=model_name,
+                name='amount',
+                field=cents_field(),
+                preserve_default=False,
+            )
+            for model_name in MODEL_NAMES
+        ],
+        migrations.RunPython(decimal_to_cents, cents_to_decimal),
+        *[
+            migrations.RemoveField(
+                model_name=model_name,
+                name='amount_decimal',
+            )
+            for model_name in MODEL_NAMES
+        ],
+    ]
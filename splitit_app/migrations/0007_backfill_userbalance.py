@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-15 20:20
+
+from collections import defaultdict
+from django.conf import settings
+from django.db import migrations
+from django.db.models import F, Sum
+
+
+def backfill_balances(apps, schema_editor):
+    """Create the missing balance rows, seeded from each user's unpaid splits"""
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserBalance = apps.get_model('splitit_app', 'UserBalance')
+    ExpenditureSplit = apps.get_model('splitit_app', 'ExpenditureSplit')
+
+    total_owed = defaultdict(int)
+    total_owes = defaultdict(int)
+    rows = ExpenditureSplit.objects.filter(is_paid=False).exclude(
+        user_id=F('expenditure__paid_by_id')
+    ).values('user_id', 'expenditure__paid_by_id').annotate(total=Sum('amount'))
+    for row in rows:
+        cents = int(row['total'] * 100)
+        total_owed[row['user_id']] += cents
+        total_owes[row['expenditure__paid_by_id']] += cents
+
+    missing = User.objects.filter(balance__isnull=True).values_list('id', flat=True)
+    UserBalance.objects.bulk_create([
+        UserBalance(
+            user_id=user_id,
+            total_owed_cents=total_owed[user_id],
+            total_owes_cents=total_owes[user_id]
+        )
+        for user_id in missing
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('splitit_app', '0006_amount_cents'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
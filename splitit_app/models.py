@@ -1,8 +1,49 @@
 from django.db import models
 from django.contrib.auth.models import User
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
 from django.core.validators import MinValueValidator
 
+
+def to_cents(amount):
+    """Convert an amount into integer cents, rounding to the nearest cent"""
+    # Go through str() so floats round from their shortest repr, not their binary value
+    return int(Decimal(str(amount)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP) * 100)
+
+
+def from_cents(cents):
+    """Convert integer cents back into a two-decimal-place amount"""
+    return Decimal(cents).scaleb(-2)
+
+
+class CentsField(models.DecimalField):
+    """Two-decimal-place amount stored in the database as integer cents"""
+    
+    def __init__(self, *args, **kwargs):
+        kwargs['decimal_places'] = 2
+        super().__init__(*args, **kwargs)
+    
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        del kwargs['decimal_places']
+        return name, path, args, kwargs
+    
+    def get_internal_type(self):
+        return 'BigIntegerField'
+    
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None or hasattr(value, 'as_sql'):
+            return value
+        # Round sub-cent input like DecimalField would instead of truncating it;
+        # to_cents is also what the balance updates use, so both always agree
+        return to_cents(value)
+    
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return from_cents(value)
+
 class Occasion(models.Model):
     """Model for grouping related events/expenses"""
     name = models.CharField(max_length=200)
@@ -40,7 +81,7 @@ class Expenditure(models.Model):
     ]
     
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='expenditures')
-    amount = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
+    amount = CentsField(max_digits=10, validators=[MinValueValidator(Decimal('0.01'))])
     description = models.CharField(max_length=200)
     paid_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='paid_expenditures')
     split_type = models.CharField(max_length=10, choices=SPLIT_TYPE_CHOICES, default='equal')
@@ -49,6 +90,11 @@ class Expenditure(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['event', 'paid_by']),
+            # Listing a payer's expenditures newest first
+            models.Index(fields=['paid_by', '-created_at']),
+        ]
     
     def __str__(self):
         return f"{self.description} - ${self.amount}"
@@ -57,13 +103,18 @@ class ExpenditureSplit(models.Model):
     """Model for tracking how an expenditure is split among users"""
     expenditure = models.ForeignKey(Expenditure, on_delete=models.CASCADE, related_name='splits')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='expenditure_splits')
-    amount = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
+    amount = CentsField(max_digits=10, validators=[MinValueValidator(Decimal('0.01'))])
     is_paid = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ['expenditure', 'user']
+        indexes = [
+            models.Index(fields=['user', 'is_paid']),
+            # Unpaid splits of the expenditures in an occasion summary
+            models.Index(fields=['expenditure', 'is_paid']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} owes ${self.amount} for {self.expenditure.description}"
@@ -78,7 +129,7 @@ class Payment(models.Model):
     
     from_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_payments')
     to_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_payments')
-    amount = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
+    amount = CentsField(max_digits=10, validators=[MinValueValidator(Decimal('0.01'))])
     description = models.CharField(max_length=200, blank=True, null=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -94,6 +145,41 @@ class Payment(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['from_user', 'status']),
+            models.Index(fields=['to_user', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"{self.from_user.username} pays ${self.amount} to {self.to_user.username}"
+
+class UserBalance(models.Model):
+    """Model for the running totals of a user's unsettled expenditure splits"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='balance')
+    # Amount the user owes to others, in cents
+    total_owed_cents = models.BigIntegerField(default=0)
+    # Amount others owe to the user, in cents
+    total_owes_cents = models.BigIntegerField(default=0)
+    # Bumped on every change so clients can revalidate cheaply
+    version = models.PositiveIntegerField(default=0)
+    
+    @property
+    def total_owed(self):
+        return from_cents(self.total_owed_cents)
+    
+    @property
+    def total_owes(self):
+        return from_cents(self.total_owes_cents)
+    
+    @property
+    def balance(self):
+        return from_cents(self.total_owes_cents - self.total_owed_cents)
+    
+    @classmethod
+    def for_user(cls, user):
+        """Return the user's balance row"""
+        # Rows are created with the user (see signals.py) and backfilled by migration 0007
+        return cls.objects.select_related('user').get(user=user)
     
     def __str__(self):
-        return f"{self.from_user.username} pays ${self.amount} to {self.to_user.username}"
\ No newline at end of file
+        return f"{self.user.username} balance: ${self.balance}"
@@ -0,0 +1,6 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """Page list endpoints newest first by cursor, so deep pages cost the same as the first"""
+    ordering = ('-created_at', '-id')
@@ -0,0 +1,27 @@
+import decimal
+import orjson
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer
+
+
+def _default(obj):
+    """Encode the values orjson has no native support for, the way DRF's JSONEncoder does"""
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, Promise):
+        return str(obj)
+    if hasattr(obj, '__iter__'):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class ORJSONRenderer(BaseRenderer):
+    """Renders responses to JSON with orjson instead of the standard library encoder"""
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
@@ -1,14 +1,34 @@
 from rest_framework import serializers
+from drf_spectacular.utils import extend_schema_field
 from django.contrib.auth.models import User
-from .models import Occasion, Event, Expenditure, ExpenditureSplit, Payment
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from .models import Occasion, Event, Expenditure, ExpenditureSplit, Payment, to_cents, from_cents
+from .balances import apply_split_balances
 from decimal import Decimal
 
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
         read_only_fields = ['id']
 
+@extend_schema_field(UserSerializer)
+class CachedUserField(serializers.Field):
+    """Read-only nested user, serialized once per user for the whole response"""
+    
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+    
+    def to_representation(self, user):
+        # The root serializer's context lives as long as the response it renders
+        cache = self.context.setdefault('user_cache', {})
+        if user.pk not in cache:
+            cache[user.pk] = UserSerializer(user).data
+        return cache[user.pk]
+
 class RegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=8)
 
@@ -28,33 +48,38 @@ class RegistrationSerializer(serializers.ModelSerializer):
         return value
 
     def create(self, validated_data):
-        password = validated_data.pop('password')
-        user = User(**validated_data)
-        user.is_staff = False
-        user.is_superuser = False
-        user.set_password(password)
-        user.save()
-        return user
+        # create_user hashes the password and inserts the non-admin user in one save
+        return User.objects.create_user(**validated_data)
 
 class OccasionSerializer(serializers.ModelSerializer):
-    created_by = UserSerializer(read_only=True)
+    created_by = CachedUserField()
     
     class Meta:
         model = Occasion
         fields = ['id', 'name', 'description', 'created_by', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Load the relations this serializer renders alongside the queryset"""
+        return queryset.select_related('created_by')
 
 class EventSerializer(serializers.ModelSerializer):
-    created_by = UserSerializer(read_only=True)
+    created_by = CachedUserField()
     occasion_name = serializers.CharField(source='occasion.name', read_only=True)
     
     class Meta:
         model = Event
         fields = ['id', 'name', 'description', 'occasion', 'occasion_name', 'created_by', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Load the relations this serializer renders alongside the queryset"""
+        return queryset.select_related('created_by', 'occasion')
 
 class ExpenditureSplitSerializer(serializers.ModelSerializer):
-    user = UserSerializer(read_only=True)
+    user = CachedUserField()
     user_id = serializers.IntegerField(write_only=True)
     
     class Meta:
@@ -62,8 +87,18 @@ class ExpenditureSplitSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'user_id', 'amount', 'is_paid', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+class ExpenditureBulkSerializer(serializers.ListSerializer):
+    """Creates a batch of expenditures in a fixed number of queries"""
+    
+    def create(self, validated_data):
+        expenditures = self.child.create_many(validated_data)
+        prefetch_related_objects(
+            expenditures, Prefetch('splits', queryset=ExpenditureSplit.objects.select_related('user'))
+        )
+        return expenditures
+
 class ExpenditureSerializer(serializers.ModelSerializer):
-    paid_by = UserSerializer(read_only=True)
+    paid_by = CachedUserField()
     splits = ExpenditureSplitSerializer(many=True, read_only=True)
     split_user_ids = serializers.ListField(
         child=serializers.IntegerField(),
@@ -85,6 +120,14 @@ class ExpenditureSerializer(serializers.ModelSerializer):
             'splits', 'split_user_ids', 'custom_amounts', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'paid_by', 'created_at', 'updated_at']
+        list_serializer_class = ExpenditureBulkSerializer
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Load the relations this serializer renders alongside the queryset"""
+        return queryset.select_related('paid_by').prefetch_related(
+            Prefetch('splits', queryset=ExpenditureSplit.objects.select_related('user'))
+        )
     
     def validate(self, data):
         if data.get('split_type') == 'custom':
@@ -97,49 +140,79 @@ class ExpenditureSerializer(serializers.ModelSerializer):
             if len(custom_amounts) != len(split_user_ids):
                 raise serializers.ValidationError("Number of custom amounts must match number of users")
             
-            if sum(custom_amounts) != data['amount']:
+            if sum(to_cents(amount) for amount in custom_amounts) != to_cents(data['amount']):
                 raise serializers.ValidationError("Sum of custom amounts must equal the total amount")
         
         return data
     
-    def create(self, validated_data):
-        split_user_ids = validated_data.pop('split_user_ids', [])
-        custom_amounts = validated_data.pop('custom_amounts', [])
-        split_type = validated_data.get('split_type', 'equal')
-        paid_by = validated_data.get('paid_by')
-        
-        expenditure = Expenditure.objects.create(**validated_data)
-        
-        if split_type == 'equal':
-            # Equal split among all users
+    @staticmethod
+    def build_splits(expenditure, split_user_ids, custom_amounts):
+        """Build the unsaved ExpenditureSplit rows for a saved expenditure"""
+        if expenditure.split_type == 'equal':
+            # Equal split among all users; leftover cents go to the first users
+            amounts = []
             if split_user_ids:
-                amount_per_user = expenditure.amount / len(split_user_ids)
-                for user_id in split_user_ids:
-                    # Mark payer's split as paid automatically
-                    is_paid = (paid_by and user_id == paid_by.id)
-                    ExpenditureSplit.objects.create(
-                        expenditure=expenditure,
-                        user_id=user_id,
-                        amount=amount_per_user,
-                        is_paid=is_paid
-                    )
+                base, remainder = divmod(to_cents(expenditure.amount), len(split_user_ids))
+                amounts = [
+                    from_cents(base + 1 if index < remainder else base)
+                    for index in range(len(split_user_ids))
+                ]
         else:
             # Custom split
-            for user_id, amount in zip(split_user_ids, custom_amounts):
+            amounts = custom_amounts
+        
+        return [
+            ExpenditureSplit(
+                expenditure=expenditure,
+                user_id=user_id,
+                amount=amount,
                 # Mark payer's split as paid automatically
-                is_paid = (paid_by and user_id == paid_by.id)
-                ExpenditureSplit.objects.create(
-                    expenditure=expenditure,
-                    user_id=user_id,
-                    amount=amount,
-                    is_paid=is_paid
-                )
+                is_paid=(user_id == expenditure.paid_by_id)
+            )
+            for user_id, amount in zip(split_user_ids, amounts)
+        ]
+    
+    @classmethod
+    def create_many(cls, validated_data_list):
+        """Create expenditures and all their splits with one bulk INSERT each"""
+        pending = []
+        for validated_data in validated_data_list:
+            split_user_ids = validated_data.pop('split_user_ids', [])
+            custom_amounts = validated_data.pop('custom_amounts', [])
+            pending.append((Expenditure(**validated_data), split_user_ids, custom_amounts))
         
-        return expenditure
+        with transaction.atomic():
+            expenditures = Expenditure.objects.bulk_create([expenditure for expenditure, _, _ in pending])
+            splits = [
+                split
+                for expenditure, split_user_ids, custom_amounts in pending
+                for split in cls.build_splits(expenditure, split_user_ids, custom_amounts)
+            ]
+            ExpenditureSplit.objects.bulk_create(splits, batch_size=500)
+            # bulk_create skips model signals, so update stored balances directly
+            apply_split_balances(splits)
+        
+        return expenditures
+    
+    def create(self, validated_data):
+        return self.create_many([validated_data])[0]
+
+class ExpenditureListSerializer(serializers.ModelSerializer):
+    """Compact expenditure representation for list views, without splits"""
+    
+    class Meta:
+        model = Expenditure
+        fields = ['id', 'event', 'amount', 'description', 'paid_by', 'split_type', 'created_at']
+        read_only_fields = fields
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        # Related fields render as primary keys, so there is nothing to load
+        return queryset
 
 class PaymentSerializer(serializers.ModelSerializer):
-    from_user = UserSerializer(read_only=True)
-    to_user = UserSerializer(read_only=True)
+    from_user = CachedUserField()
+    to_user = CachedUserField()
     to_user_id = serializers.IntegerField(write_only=True)
     expenditure_split_id = serializers.IntegerField(source='expenditure_split.id', read_only=True)
     expenditure_split = serializers.PrimaryKeyRelatedField(
@@ -153,15 +226,22 @@ class PaymentSerializer(serializers.ModelSerializer):
             'status', 'created_at', 'updated_at', 'expenditure_split_id', 'expenditure_split'
         ]
         read_only_fields = ['id', 'from_user', 'created_at', 'updated_at']
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Load the relations this serializer renders alongside the queryset"""
+        return queryset.select_related('from_user', 'to_user', 'expenditure_split')
 
 class UserBalanceSerializer(serializers.Serializer):
-    user = UserSerializer()
-    balance = serializers.DecimalField(max_digits=10, decimal_places=2, coerce_to_string=False)
-    total_owed = serializers.DecimalField(max_digits=10, decimal_places=2, coerce_to_string=False)
-    total_owes = serializers.DecimalField(max_digits=10, decimal_places=2, coerce_to_string=False)
+    # Balances are rendered as JSON numbers; FloatField skips DecimalField's
+    # quantize step and lets the JSON encoder handle them natively
+    user = CachedUserField()
+    balance = serializers.FloatField()
+    total_owed = serializers.FloatField()
+    total_owes = serializers.FloatField()
 
 class OccasionSummarySerializer(serializers.Serializer):
     occasion = OccasionSerializer()
-    total_expenditures = serializers.DecimalField(max_digits=10, decimal_places=2, coerce_to_string=False)
+    total_expenditures = serializers.FloatField()
     total_events = serializers.IntegerField()
     user_balances = UserBalanceSerializer(many=True)
@@ -0,0 +1,59 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.contrib.auth.models import User
+from django.dispatch import receiver
+from .balances import apply_balance_changes, apply_split_balances, contribution, paid_by_id
+from .models import ExpenditureSplit, UserBalance
+
+
+@receiver(pre_save, sender=ExpenditureSplit)
+def remember_split_contribution(sender, instance, raw=False, **kwargs):
+    """Capture what an existing split contributed before it is overwritten"""
+    instance._previous_contribution = None
+    if raw or instance._state.adding:
+        return
+    previous = ExpenditureSplit.objects.filter(pk=instance.pk).values(
+        'user_id', 'amount', 'is_paid', 'expenditure__paid_by_id'
+    ).first()
+    if previous:
+        instance._previous_contribution = contribution(
+            previous['user_id'], previous['amount'], previous['is_paid'], previous['expenditure__paid_by_id']
+        )
+
+
+@receiver(post_save, sender=ExpenditureSplit)
+def update_balances_on_split_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Swap the split's previous contribution for its current one in a single update
+    previous = getattr(instance, '_previous_contribution', None)
+    if previous:
+        debtor_id, creditor_id, cents = previous
+        previous = (debtor_id, creditor_id, -cents)
+    current = contribution(instance.user_id, instance.amount, instance.is_paid, paid_by_id(instance))
+    apply_balance_changes([previous, current])
+
+
+@receiver(pre_delete, sender=ExpenditureSplit)
+def collect_deleted_split(sender, instance, origin=None, **kwargs):
+    """Gather the splits removed by one delete() call on the object that started it"""
+    if origin is not None:
+        origin.__dict__.setdefault('_deleted_splits', []).append(instance)
+
+
+@receiver(post_delete, sender=ExpenditureSplit)
+def update_balances_on_split_delete(sender, instance, origin=None, **kwargs):
+    # pre_delete runs for every collected split before any post_delete, so the
+    # first post_delete removes the whole batch in one update and later ones skip
+    if origin is None:
+        apply_split_balances([instance], sign=-1)
+        return
+    splits = origin.__dict__.pop('_deleted_splits', None)
+    if splits:
+        apply_split_balances(splits, sign=-1)
+
+
+@receiver(post_save, sender=User)
+def create_user_balance(sender, instance, created, raw=False, **kwargs):
+    # Every user gets a balance row up front, so split deltas always have a row to update
+    if created and not raw:
+        UserBalance.objects.create(user=instance)
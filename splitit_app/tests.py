@@ -5,31 +5,31 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 from decimal import Decimal
-from .models import Occasion, Event, Expenditure, ExpenditureSplit, Payment
+from .models import Occasion, Event, Expenditure, ExpenditureSplit, Payment, UserBalance
 
 class SplitItAPITestCase(APITestCase):
-    def setUp(self):
-        """Set up test data"""
-        self.user1 = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by every test in the class"""
+        cls.user1 = User.objects.create_user(
             username='user1',
             email='user1@example.com',
             password='testpass123'
         )
-        self.user2 = User.objects.create_user(
+        cls.user2 = User.objects.create_user(
             username='user2',
             email='user2@example.com',
             password='testpass123'
         )
-        self.user3 = User.objects.create_user(
+        cls.user3 = User.objects.create_user(
             username='user3',
             email='user3@example.com',
             password='testpass123'
         )
-        
-        # Get JWT token for user1
-        refresh = RefreshToken.for_user(self.user1)
-        self.access_token = str(refresh.access_token)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+    def setUp(self):
+        # Skip JWT signing and verification; AuthenticationTest covers real tokens
+        self.client.force_authenticate(user=self.user1)
 
 class OccasionAPITest(SplitItAPITestCase):
     def test_create_occasion(self):
@@ -51,7 +51,22 @@ class OccasionAPITest(SplitItAPITestCase):
         )
         response = self.client.get('/api/occasions/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_list_occasions_paginated(self):
+        """Test listing occasions a page at a time"""
+        Occasion.objects.bulk_create([
+            Occasion(name=f'Occasion {index}', created_by=self.user1) for index in range(51)
+        ])
+        response = self.client.get('/api/occasions/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 50)
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
 
     def test_occasion_detail(self):
         """Test retrieving occasion detail"""
@@ -64,11 +79,12 @@ class OccasionAPITest(SplitItAPITestCase):
         self.assertEqual(response.data['name'], 'Test Occasion')
 
 class EventAPITest(SplitItAPITestCase):
-    def setUp(self):
-        super().setUp()
-        self.occasion = Occasion.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.occasion = Occasion.objects.create(
             name='Test Occasion',
-            created_by=self.user1
+            created_by=cls.user1
         )
 
     def test_create_event_with_occasion(self):
@@ -95,11 +111,12 @@ class EventAPITest(SplitItAPITestCase):
         self.assertIsNone(Event.objects.get().occasion)
 
 class ExpenditureAPITest(SplitItAPITestCase):
-    def setUp(self):
-        super().setUp()
-        self.event = Event.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.event = Event.objects.create(
             name='Test Event',
-            created_by=self.user1
+            created_by=cls.user1
         )
 
     def test_create_expenditure_equal_split(self):
@@ -123,6 +140,23 @@ class ExpenditureAPITest(SplitItAPITestCase):
             # Payer (user1) is not in split, so all splits should be unpaid
             self.assertFalse(split.is_paid)
     
+    def test_create_expenditure_equal_split_remainder(self):
+        """Test that cents left over by an equal split are distributed, not dropped"""
+        data = {
+            'event': self.event.id,
+            'amount': '100.00',
+            'description': 'Test expense',
+            'split_type': 'equal',
+            'split_user_ids': [self.user1.id, self.user2.id, self.user3.id]
+        }
+        response = self.client.post('/api/expenditures/', data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        amounts = sorted(
+            ExpenditureSplit.objects.filter(expenditure__id=response.data['id']).values_list('amount', flat=True)
+        )
+        self.assertEqual(amounts, [Decimal('33.33'), Decimal('33.33'), Decimal('33.34')])
+    
     def test_create_expenditure_with_payer_in_split(self):
         """Test that payer's split is automatically marked as paid when included in split"""
         data = {
@@ -204,6 +238,78 @@ class ExpenditureAPITest(SplitItAPITestCase):
         self.assertFalse(other_split.is_paid)
         self.assertEqual(other_split.amount, Decimal('40.00'))
 
+    def test_bulk_create_expenditures(self):
+        """Test creating several expenditures in one request"""
+        data = [
+            {
+                'event': self.event.id,
+                'amount': '100.00',
+                'description': 'Dinner',
+                'split_type': 'equal',
+                'split_user_ids': [self.user1.id, self.user2.id]
+            },
+            {
+                'event': self.event.id,
+                'amount': '90.00',
+                'description': 'Taxi',
+                'split_type': 'custom',
+                'split_user_ids': [self.user2.id, self.user3.id],
+                'custom_amounts': ['60.00', '30.00']
+            }
+        ]
+        response = self.client.post('/api/expenditures/bulk/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(Expenditure.objects.filter(paid_by=self.user1).count(), 2)
+        self.assertEqual(len(response.data[1]['splits']), 2)
+        self.assertTrue(
+            ExpenditureSplit.objects.get(expenditure__id=response.data[0]['id'], user=self.user1).is_paid
+        )
+        
+        response = self.client.get('/api/user/balance/')
+        self.assertEqual(response.data['total_owes'], 140.0)
+
+    def test_list_expenditures(self):
+        """Test that the expenditure list leaves out splits"""
+        expenditure = Expenditure.objects.create(
+            event=self.event,
+            amount=Decimal('100.00'),
+            description='Test expense',
+            paid_by=self.user1
+        )
+        ExpenditureSplit.objects.create(
+            expenditure=expenditure,
+            user=self.user2,
+            amount=Decimal('100.00')
+        )
+        response = self.client.get('/api/expenditures/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['paid_by'], self.user1.id)
+        self.assertNotIn('splits', response.data['results'][0])
+        
+        response = self.client.get(f'/api/expenditures/{expenditure.id}/')
+        self.assertEqual(len(response.data['splits']), 1)
+
+    def test_event_expenditures_query_count(self):
+        """Test that listing an event's expenditures doesn't query per expenditure or split"""
+        for description in ['Dinner', 'Taxi', 'Hotel']:
+            expenditure = Expenditure.objects.create(
+                event=self.event,
+                amount=Decimal('100.00'),
+                description=description,
+                paid_by=self.user1
+            )
+            ExpenditureSplit.objects.bulk_create([
+                ExpenditureSplit(expenditure=expenditure, user=self.user2, amount=Decimal('50.00')),
+                ExpenditureSplit(expenditure=expenditure, user=self.user3, amount=Decimal('50.00')),
+            ])
+        # Event, expenditures with payers, splits with users
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/events/{self.event.id}/expenditures/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 3)
+
     def test_create_expenditure_invalid_custom_split(self):
         """Test creating an expenditure with invalid custom split amounts"""
         data = {
@@ -245,12 +351,18 @@ class PaymentAPITest(SplitItAPITestCase):
             user=self.user1,
             amount=Decimal('50.00')
         )
+        response = self.client.get('/api/user/balance/')
+        self.assertEqual(response.data['total_owed'], 50.0)
+        
         response = self.client.post(f'/api/expenditure-splits/{split.id}/settle/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         split.refresh_from_db()
         self.assertTrue(split.is_paid)
         payment = Payment.objects.get(expenditure_split=split)
         self.assertEqual(payment.status, 'completed')
+        
+        response = self.client.get('/api/user/balance/')
+        self.assertEqual(response.data['total_owed'], 0.0)
 
 class UserBalanceAPITest(SplitItAPITestCase):
     def test_user_balance(self):
@@ -274,6 +386,7 @@ class UserBalanceAPITest(SplitItAPITestCase):
         self.assertEqual(response.data['total_owes'], Decimal('50.00'))
         self.assertEqual(response.data['total_owed'], Decimal('0.00'))
         self.assertEqual(response.data['balance'], Decimal('50.00'))
+        self.assertEqual(response.json()['balance'], 50.0)
     
     def test_user_balance_payer_in_split(self):
         """Test balance when payer is included in the split"""
@@ -305,6 +418,109 @@ class UserBalanceAPITest(SplitItAPITestCase):
         self.assertEqual(response.data['total_owed'], Decimal('0.00'))  # user1 doesn't owe (their split is paid)
         self.assertEqual(response.data['balance'], Decimal('50.00'))  # Net balance
 
+    def test_user_balance_etag_revalidation(self):
+        """Test that an unchanged balance answers 304 and a new split invalidates it"""
+        event = Event.objects.create(name='Test Event', created_by=self.user1)
+        expenditure = Expenditure.objects.create(
+            event=event,
+            amount=Decimal('100.00'),
+            description='Test expense',
+            paid_by=self.user1
+        )
+        ExpenditureSplit.objects.create(
+            expenditure=expenditure,
+            user=self.user2,
+            amount=Decimal('50.00')
+        )
+        
+        response = self.client.get('/api/user/balance/')
+        etag = response['ETag']
+        # Revalidated from the balance row alone
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/user/balance/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        # Proxies may weaken the validator; `*` matches any current representation
+        response = self.client.get('/api/user/balance/', HTTP_IF_NONE_MATCH=f'W/{etag}')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get('/api/user/balance/', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        ExpenditureSplit.objects.create(
+            expenditure=expenditure,
+            user=self.user3,
+            amount=Decimal('50.00')
+        )
+        response = self.client.get('/api/user/balance/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_owes'], Decimal('100.00'))
+
+    def test_user_balance_maintained_on_write(self):
+        """Test that the stored balance follows splits created, settled and deleted after it exists"""
+        self.client.get('/api/user/balance/')
+        event = Event.objects.create(name='Test Event', created_by=self.user1)
+        response = self.client.post('/api/expenditures/', {
+            'event': event.id,
+            'amount': '100.00',
+            'description': 'Test expense',
+            'split_type': 'equal',
+            'split_user_ids': [self.user1.id, self.user2.id, self.user3.id]
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        expenditure_id = response.data['id']
+        response = self.client.get('/api/user/balance/')
+        self.assertEqual(response.data['total_owes'], 66.66)
+        
+        split = ExpenditureSplit.objects.get(expenditure__id=expenditure_id, user=self.user2)
+        split.is_paid = True
+        split.save()
+        response = self.client.get('/api/user/balance/')
+        self.assertEqual(response.data['total_owes'], 33.33)
+        
+        Expenditure.objects.get(id=expenditure_id).delete()
+        response = self.client.get('/api/user/balance/')
+        self.assertEqual(response.data['total_owes'], Decimal('0.00'))
+
+    def test_user_balance_from_float_amount(self):
+        """Test that a split created with a float amount moves the balance by the rounded cents"""
+        self.client.get('/api/user/balance/')
+        event = Event.objects.create(name='Test Event', created_by=self.user1)
+        expenditure = Expenditure.objects.create(
+            event=event,
+            amount=Decimal('0.29'),
+            description='Test expense',
+            paid_by=self.user1
+        )
+        split = ExpenditureSplit.objects.create(expenditure=expenditure, user=self.user2, amount=0.29)
+        self.assertEqual(UserBalance.objects.get(user=self.user1).total_owes_cents, 29)
+        
+        split.delete()
+        self.assertEqual(UserBalance.objects.get(user=self.user1).total_owes_cents, 0)
+
+    def test_user_balance_on_cascade_delete(self):
+        """Test that deleting an expenditure removes all of its splits from the balances in one update"""
+        event = Event.objects.create(name='Test Event', created_by=self.user1)
+        expenditure = Expenditure.objects.create(
+            event=event,
+            amount=Decimal('90.00'),
+            description='Test expense',
+            paid_by=self.user1
+        )
+        for user in (self.user1, self.user2, self.user3):
+            ExpenditureSplit.objects.create(
+                expenditure=expenditure,
+                user=user,
+                amount=Decimal('30.00'),
+                is_paid=(user == self.user1)
+            )
+        self.assertEqual(UserBalance.objects.get(user=self.user1).total_owes_cents, 6000)
+
+        # Collect splits, detach payments, delete splits, load payers, update balances, delete expenditure
+        with self.assertNumQueries(6):
+            expenditure.delete()
+        self.assertEqual(UserBalance.objects.get(user=self.user1).total_owes_cents, 0)
+        self.assertEqual(UserBalance.objects.get(user=self.user2).total_owed_cents, 0)
+        self.assertEqual(UserBalance.objects.get(user=self.user3).total_owed_cents, 0)
+
 class OccasionSummaryAPITest(SplitItAPITestCase):
     def test_occasion_summary(self):
         """Test getting occasion summary"""
@@ -333,6 +549,73 @@ class OccasionSummaryAPITest(SplitItAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['total_expenditures'], Decimal('100.00'))
         self.assertEqual(response.data['total_events'], 1)
+        balances = {entry['user']['id']: entry for entry in response.data['user_balances']}
+        self.assertEqual(set(balances), {self.user1.id, self.user2.id})
+        self.assertEqual(balances[self.user1.id]['total_owes'], 50.0)
+        self.assertEqual(balances[self.user1.id]['total_owed'], 0.0)
+        self.assertEqual(balances[self.user2.id]['total_owed'], 50.0)
+        self.assertEqual(balances[self.user2.id]['balance'], -50.0)
+
+    def test_occasion_summary_etag_revalidation(self):
+        """Test that an unchanged summary answers 304 and a new split changes it"""
+        occasion = Occasion.objects.create(name='Test Occasion', created_by=self.user1)
+        event = Event.objects.create(name='Test Event', occasion=occasion, created_by=self.user1)
+        expenditure = Expenditure.objects.create(
+            event=event,
+            amount=Decimal('100.00'),
+            description='Test expense',
+            paid_by=self.user1
+        )
+        ExpenditureSplit.objects.create(expenditure=expenditure, user=self.user2, amount=Decimal('50.00'))
+
+        response = self.client.get(f'/api/occasions/{occasion.id}/summary/')
+        etag = response['ETag']
+        response = self.client.get(f'/api/occasions/{occasion.id}/summary/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        ExpenditureSplit.objects.create(expenditure=expenditure, user=self.user3, amount=Decimal('50.00'))
+        response = self.client.get(f'/api/occasions/{occasion.id}/summary/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['user_balances']), 3)
+
+    def test_occasion_summary_without_events(self):
+        """Test that an occasion without events is summarized without aggregate queries"""
+        occasion = Occasion.objects.create(
+            name='Empty Occasion',
+            created_by=self.user1
+        )
+        # Occasion, events
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/occasions/{occasion.id}/summary/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_expenditures'], 0)
+        self.assertEqual(response.data['total_events'], 0)
+        self.assertEqual(response.data['user_balances'], [])
+
+class CentsFieldTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user1', password='testpass123')
+        cls.event = Event.objects.create(name='Test Event', created_by=cls.user)
+
+    def create_expenditure(self, amount):
+        expenditure = Expenditure.objects.create(
+            event=self.event,
+            amount=amount,
+            description='Test expense',
+            paid_by=self.user
+        )
+        expenditure.refresh_from_db()
+        return expenditure
+
+    def test_float_amount(self):
+        """Test that a float amount is stored as its nearest cent"""
+        self.assertEqual(self.create_expenditure(0.29).amount, Decimal('0.29'))
+
+    def test_sub_cent_amount(self):
+        """Test that a sub-cent amount is rounded rather than truncated"""
+        self.assertEqual(self.create_expenditure(Decimal('0.015')).amount, Decimal('0.02'))
+        self.assertEqual(self.create_expenditure(Decimal('0.014')).amount, Decimal('0.01'))
 
 class AuthenticationTest(APITestCase):
     def test_unauthenticated_access(self):
@@ -340,6 +623,24 @@ class AuthenticationTest(APITestCase):
         response = self.client.get('/api/occasions/')
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    def test_register_user(self):
+        """Test registering a new non-admin user"""
+        data = {
+            'username': 'newuser',
+            'password': 'testpass123',
+            'first_name': 'New',
+            'last_name': 'User',
+            'email': 'newuser@example.com'
+        }
+        response = self.client.post('/api/auth/register/', data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = User.objects.get(username='newuser')
+        self.assertTrue(user.check_password('testpass123'))
+        self.assertFalse(user.is_staff)
+        self.assertFalse(user.is_superuser)
+        # Balance rows are created with the user, ready for split deltas
+        self.assertTrue(UserBalance.objects.filter(user=user).exists())
+
     def test_token_authentication(self):
         """Test JWT token authentication"""
         user = User.objects.create_user(
@@ -14,6 +14,7 @@ urlpatterns = [
     
     # Expenditure URLs
     path('expenditures/', views.ExpenditureListCreateView.as_view(), name='expenditure-list-create'),
+    path('expenditures/bulk/', views.ExpenditureBulkCreateView.as_view(), name='expenditure-bulk-create'),
     path('expenditures/<int:pk>/', views.ExpenditureDetailView.as_view(), name='expenditure-detail'),
     
     # Payment URLs
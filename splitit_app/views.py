@@ -3,22 +3,93 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django.contrib.auth.models import User
-from django.db.models import Sum, Q
+from django.db import transaction
+from django.db.models import Sum, Q, F
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils import timezone
+from django.utils.http import quote_etag
+from collections import defaultdict
 from decimal import Decimal
-from .models import Occasion, Event, Expenditure, ExpenditureSplit, Payment
+import hashlib
+import json
+from .models import Occasion, Event, Expenditure, ExpenditureSplit, Payment, UserBalance
+from .balances import apply_split_balances
 from .serializers import (
-    OccasionSerializer, EventSerializer, ExpenditureSerializer,
+    OccasionSerializer, EventSerializer, ExpenditureSerializer, ExpenditureListSerializer,
     PaymentSerializer, UserBalanceSerializer, OccasionSummarySerializer, RegistrationSerializer
 )
 
 
+def _etag_response(request, etag, build):
+    """Answer 304 when the client already holds `etag`, otherwise respond with `build()`"""
+    etag = quote_etag(etag)
+    # Django's conditional GET handling covers weak validators and `If-None-Match: *`
+    response = get_conditional_response(request, etag=etag) or Response(build())
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def _summarize(occasion, event_ids):
+    """Compute the summary of an occasion from the ids of its events"""
+    # Calculate total expenditures
+    total_expenditures = Expenditure.objects.filter(
+        event__in=event_ids
+    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+
+    # Get all users involved in this occasion, reading only their ids;
+    # UNION de-duplicates payers and split users in a single query
+    user_ids = set(
+        Expenditure.objects.filter(event__in=event_ids).order_by()
+        .values_list('paid_by_id', flat=True)
+        .union(
+            ExpenditureSplit.objects.filter(expenditure__event__in=event_ids)
+            .values_list('user_id', flat=True)
+        )
+    )
+
+    # Sum unpaid splits per (user, payer) pair in one grouped query
+    # (exclude splits where user is the payer)
+    total_owed = defaultdict(Decimal)
+    total_owes = defaultdict(Decimal)
+    rows = ExpenditureSplit.objects.filter(
+        expenditure__event__in=event_ids, is_paid=False
+    ).exclude(
+        user_id=F('expenditure__paid_by_id')
+    ).values('user_id', 'expenditure__paid_by_id').annotate(total=Sum('amount'))
+    for row in rows:
+        total_owed[row['user_id']] += row['total']
+        total_owes[row['expenditure__paid_by_id']] += row['total']
+
+    users = User.objects.in_bulk(user_ids)
+    user_balances = [
+        {
+            'user': users[user_id],
+            'balance': total_owes[user_id] - total_owed[user_id],
+            'total_owed': total_owed[user_id],
+            'total_owes': total_owes[user_id]
+        }
+        for user_id in sorted(users)
+    ]
+
+    return OccasionSummarySerializer({
+        'occasion': occasion,
+        'total_expenditures': total_expenditures,
+        'total_events': len(event_ids),
+        'user_balances': user_balances
+    }).data
+
+
 class OccasionListCreateView(generics.ListCreateAPIView):
     """List and create occasions"""
     serializer_class = OccasionSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Occasion.objects.filter(created_by=self.request.user)
+        return OccasionSerializer.setup_eager_loading(
+            Occasion.objects.filter(created_by=self.request.user)
+        )
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
@@ -30,7 +101,9 @@ class OccasionDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Occasion.objects.filter(created_by=self.request.user)
+        return OccasionSerializer.setup_eager_loading(
+            Occasion.objects.filter(created_by=self.request.user)
+        )
 
 
 class EventListCreateView(generics.ListCreateAPIView):
@@ -39,7 +112,9 @@ class EventListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Event.objects.filter(created_by=self.request.user)
+        return EventSerializer.setup_eager_loading(
+            Event.objects.filter(created_by=self.request.user)
+        )
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
@@ -51,7 +126,9 @@ class EventDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Event.objects.filter(created_by=self.request.user)
+        return EventSerializer.setup_eager_loading(
+            Event.objects.filter(created_by=self.request.user)
+        )
 
 
 class RegisterUserView(generics.CreateAPIView):
@@ -65,8 +142,29 @@ class ExpenditureListCreateView(generics.ListCreateAPIView):
     serializer_class = ExpenditureSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_serializer_class(self):
+        # Listing skips the per-expenditure splits; retrieve them from the detail view
+        if self.request.method == 'GET':
+            return ExpenditureListSerializer
+        return ExpenditureSerializer
+
     def get_queryset(self):
-        return Expenditure.objects.filter(paid_by=self.request.user)
+        return self.get_serializer_class().setup_eager_loading(
+            Expenditure.objects.filter(paid_by=self.request.user)
+        )
+
+    def perform_create(self, serializer):
+        serializer.save(paid_by=self.request.user)
+
+
+class ExpenditureBulkCreateView(generics.CreateAPIView):
+    """Create a batch of expenditures from a JSON list in one request"""
+    serializer_class = ExpenditureSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs['many'] = True
+        return super().get_serializer(*args, **kwargs)
 
     def perform_create(self, serializer):
         serializer.save(paid_by=self.request.user)
@@ -78,7 +176,9 @@ class ExpenditureDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Expenditure.objects.filter(paid_by=self.request.user)
+        return ExpenditureSerializer.setup_eager_loading(
+            Expenditure.objects.filter(paid_by=self.request.user)
+        )
 
 
 class PaymentListCreateView(generics.ListCreateAPIView):
@@ -87,9 +187,9 @@ class PaymentListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Payment.objects.filter(
+        return PaymentSerializer.setup_eager_loading(Payment.objects.filter(
             Q(from_user=self.request.user) | Q(to_user=self.request.user)
-        )
+        ))
 
     def perform_create(self, serializer):
         serializer.save(from_user=self.request.user)
@@ -101,37 +201,23 @@ class PaymentDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Payment.objects.filter(
+        return PaymentSerializer.setup_eager_loading(Payment.objects.filter(
             Q(from_user=self.request.user) | Q(to_user=self.request.user)
-        )
+        ))
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_balance(request):
     """Get user's balance summary"""
-    user = request.user
-
-    # Calculate total amount user owes (exclude splits where user is the payer)
-    total_owed = ExpenditureSplit.objects.filter(
-        user=user, is_paid=False
-    ).exclude(expenditure__paid_by=user).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-    # Calculate total amount user is owed
-    total_owes = ExpenditureSplit.objects.filter(
-        expenditure__paid_by=user, is_paid=False
-    ).exclude(user=user).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-    balance = total_owes - total_owed
-
-    serializer = UserBalanceSerializer({
-        'user': user,
-        'balance': balance,
-        'total_owed': total_owed,
-        'total_owes': total_owes
-    })
-
-    return Response(serializer.data)
+    # Totals are maintained on write (see balances.py), so this is a single row read;
+    # the row's version changes with every write and doubles as the ETag
+    balance = UserBalance.for_user(request.user)
+    return _etag_response(
+        request,
+        f"user-balance-{balance.user_id}-{balance.version}",
+        lambda: UserBalanceSerializer(balance).data
+    )
 
 
 @api_view(['GET'])
@@ -139,56 +225,28 @@ def user_balance(request):
 def occasion_summary(request, occasion_id):
     """Get occasion expenditure summary"""
     try:
-        occasion = Occasion.objects.get(id=occasion_id, created_by=request.user)
+        occasion = Occasion.objects.select_related('created_by').get(id=occasion_id, created_by=request.user)
     except Occasion.DoesNotExist:
         return Response({'error': 'Occasion not found'}, status=status.HTTP_404_NOT_FOUND)
 
     # Get all events for this occasion
-    events = occasion.events.all()
-
-    # Calculate total expenditures
-    total_expenditures = Expenditure.objects.filter(
-        event__in=events
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+    event_ids = list(occasion.events.order_by().values_list('id', flat=True))
 
-    # Get all users involved in this occasion
-    user_ids = set()
-    for event in events:
-        for expenditure in event.expenditures.all():
-            user_ids.add(expenditure.paid_by.id)
-            for split in expenditure.splits.all():
-                user_ids.add(split.user.id)
-
-    users = User.objects.filter(id__in=user_ids)
-    user_balances = []
-
-    for user in users:
-        # Calculate user's balance for this occasion (exclude splits where user is the payer)
-        total_owed = ExpenditureSplit.objects.filter(
-            user=user, expenditure__event__in=events, is_paid=False
-        ).exclude(expenditure__paid_by=user).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-        total_owes = ExpenditureSplit.objects.filter(
-            expenditure__paid_by=user, expenditure__event__in=events, is_paid=False
-        ).exclude(user=user).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-        balance = total_owes - total_owed
-
-        user_balances.append({
-            'user': user,
-            'balance': balance,
-            'total_owed': total_owed,
-            'total_owes': total_owes
-        })
-
-    serializer = OccasionSummarySerializer({
-        'occasion': occasion,
-        'total_expenditures': total_expenditures,
-        'total_events': events.count(),
-        'user_balances': user_balances
-    })
+    if not event_ids:
+        # Nothing to aggregate for an occasion without events
+        data = OccasionSummarySerializer({
+            'occasion': occasion,
+            'total_expenditures': Decimal('0.00'),
+            'total_events': 0,
+            'user_balances': []
+        }).data
+    else:
+        data = _summarize(occasion, event_ids)
 
-    return Response(serializer.data)
+    # The summary is recomputed on every request; the ETag only spares the
+    # transfer when the client already holds the same content
+    content = json.dumps(data, sort_keys=True, default=str).encode()
+    return _etag_response(request, hashlib.md5(content, usedforsecurity=False).hexdigest(), lambda: data)
 
 
 @api_view(['POST'])
@@ -200,30 +258,35 @@ def settle_expenditure_split(request, split_id):
     - Authenticated user must match the split's user.
     - Marks the split as paid and creates a completed payment linked to this split using the split amount.
     """
-    try:
-        split = ExpenditureSplit.objects.select_related('expenditure', 'expenditure__paid_by', 'user').get(
-            id=split_id,
-            is_paid=False
+    with transaction.atomic():
+        # Lock the split row so concurrent requests can't settle it twice
+        try:
+            split = ExpenditureSplit.objects.select_for_update(of=('self',)).select_related(
+                'expenditure', 'expenditure__paid_by', 'user'
+            ).get(
+                id=split_id,
+                is_paid=False
+            )
+        except ExpenditureSplit.DoesNotExist:
+            return Response({'error': 'Expenditure split not found or already settled'}, status=status.HTTP_404_NOT_FOUND)
+
+        if split.user_id != request.user.id:
+            return Response({'error': 'You can only settle your own split'}, status=status.HTTP_403_FORBIDDEN)
+
+        # Create a completed payment linked to this split
+        payment = Payment.objects.create(
+            from_user=request.user,
+            to_user=split.expenditure.paid_by,
+            amount=split.amount,
+            description=f"Settlement for expenditure split {split.id}",
+            status='completed',
+            expenditure_split=split
         )
-    except ExpenditureSplit.DoesNotExist:
-        return Response({'error': 'Expenditure split not found or already settled'}, status=status.HTTP_404_NOT_FOUND)
-
-    if split.user_id != request.user.id:
-        return Response({'error': 'You can only settle your own split'}, status=status.HTTP_403_FORBIDDEN)
-
-    # Create a completed payment linked to this split
-    payment = Payment.objects.create(
-        from_user=request.user,
-        to_user=split.expenditure.paid_by,
-        amount=split.amount,
-        description=f"Settlement for expenditure split {split.id}",
-        status='completed',
-        expenditure_split=split
-    )
 
-    # Mark the split as paid
-    split.is_paid = True
-    split.save(update_fields=['is_paid', 'updated_at'])
+        # Mark the split as paid in a single UPDATE; this bypasses the save signals,
+        # so take its unpaid amount off the stored balances directly
+        ExpenditureSplit.objects.filter(pk=split.pk).update(is_paid=True, updated_at=timezone.now())
+        apply_split_balances([split], sign=-1)
 
     serializer = PaymentSerializer(payment)
     return Response(serializer.data, status=status.HTTP_200_OK)
@@ -238,6 +301,6 @@ def event_expenditures(request, event_id):
     except Event.DoesNotExist:
         return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
 
-    expenditures = event.expenditures.all()
+    expenditures = ExpenditureSerializer.setup_eager_loading(event.expenditures.all())
     serializer = ExpenditureSerializer(expenditures, many=True)
     return Response(serializer.data)